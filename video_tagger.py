@@ -20,24 +20,78 @@ import time
 import math
 import argparse
 import itertools
+import cProfile
+import pstats
+import json
+import csv
+import functools
+import struct
+import mmap
+import queue
 
-from contextlib import suppress
+from contextlib import ExitStack, suppress
 
 # For spawning threads for the I/O bound tagger
 from multiprocessing.dummy import Pool as ThreadPool
-from threading import Thread, Lock
+from threading import Thread, Lock, BoundedSemaphore, local, get_ident, current_thread
 
 INDEX_TOOL_PATH = 0
 INDEX_TOOL_OPTIONS = 1
 
 # Spawn four threads for each CPU core found
 COUNT_THREADS_TAGGER = multiprocessing.cpu_count() * 4
+# An audit only reads, so there's no write contention to hold back for. Spawn eight threads for each CPU core found.
+COUNT_THREADS_AUDIT = multiprocessing.cpu_count() * 8
+
+# Every EBML (Matroska/WebM) file begins with this magic, followed by a header naming the DocType
+MAGIC_EBML = b"\x1a\x45\xdf\xa3"
+SIZE_HEADER_EBML_READ = 4096
+
+FORMATS_RESULT_REPORT = ("jsonl", "csv")
+FIELDS_RESULT_REPORT = ("path", "outcome", "title_old", "title_new", "durations_ms", "errors")
+
+# File manifest layout (little endian):
+# - Header: magic, version, directory count, file count, and offsets to the tables and the names blob
+# - Directory table: offset and length of each directory's path in the names blob
+# - File table: directory index, offset and length of the file's name in the names blob, size and mtime (ns)
+# - Names blob: file system encoded directory paths and file names
+MAGIC_MANIFEST = b"VTMF"
+VERSION_MANIFEST = 1
+STRUCT_MANIFEST_HEADER = struct.Struct("<4sHIIQQQ")
+STRUCT_MANIFEST_DIR = struct.Struct("<II")
+STRUCT_MANIFEST_FILE = struct.Struct("<IIHQq")
+
+# Number of files from a manifest handed to the thread pool ahead of the workers, to keep the paths in memory bounded,
+# and the number handed to a worker at a time. The former must exceed the latter, else a chunk could never be filled.
+COUNT_FILES_MANIFEST_QUEUED = 4096
+COUNT_FILES_MANIFEST_CHUNK = 16
+
+# Number of per-file results queued for the report writer before workers wait on it, to keep memory bounded
+COUNT_RESULTS_QUEUED = 1024
+
+# mkvpropedit rewrites Segment Info in place, or appends a relocated Info at the tail and overwrites the old one with
+# a Void, updating the SeekHead near the head. Compare this much of the head before and after a write, plus the old
+# Info (wherever it is) and a block past it, to find the byte ranges touched.
+SIZE_CHANGE_WINDOW = 1024 * 1024
+SIZE_CHANGE_BLOCK = 4096
+
+# EBML element IDs used to locate Segment Info
+ID_EBML_HEADER = 0x1A45DFA3
+ID_EBML_SEGMENT = 0x18538067
+ID_EBML_SEEK_HEAD = 0x114D9B74
+ID_EBML_SEEK = 0x4DBB
+ID_EBML_SEEK_ID = 0x53AB
+ID_EBML_SEEK_POSITION = 0x53AC
+ID_EBML_INFO = 0x1549A966
+ID_EBML_CLUSTER = 0x1F43B675
+ID_EBML_TITLE = 0x7BA9
 
 mutex_count = Lock()
 mutex_time = Lock()
 mutex_console = Lock()
-mutex_list_files_failed_probe = Lock()
-mutex_list_files_failed_metadata_set = Lock()
+
+# Mutexes swapped for wait time accounting wrappers when profiling
+NAMES_MUTEX_PROFILED = ("mutex_count", "mutex_time", "mutex_console")
 
 
 # Show tool tip/notification/toast message
@@ -141,6 +195,9 @@ def logging_initialize():
 	name_script_executable = os.path.basename(os.path.realpath(__file__)).partition(".")[0]
 	dirs = AppDirs(name_script_executable, "Jay Ramani")
 
+	# Stamp auxiliary output (profiles, reports) with the same prefix as the log file
+	logging_initialize.prefix_output = name_script_executable + " - " + time.strftime("%Y%m%d%I%M%S%z")
+
 	try:
 		os.makedirs(dirs.user_log_dir, exist_ok = True)
 	except PermissionError:
@@ -151,12 +208,191 @@ def logging_initialize():
 	else:
 		print("Check logging results at \'" + dirs.user_log_dir + "\'\n")
 
+		logging_initialize.path_log_dir = dirs.user_log_dir
+
 		# All good. Proceed with logging.
-		logging.basicConfig(filename = dirs.user_log_dir + os.path.sep + name_script_executable + " - " +
-		   time.strftime("%Y%m%d%I%M%S%z") + '.log', level = logging.INFO, format = "%(message)s")
+		logging.basicConfig(filename = dirs.user_log_dir + os.path.sep + logging_initialize.prefix_output + '.log',
+		                    level = logging.INFO, format = "%(message)s")
 		logging.info("Log beginning at " + time.strftime("%d %b %Y (%a) %I:%M:%S %p %Z (GMT%z)") + " with PID: " + str(
 			os.getpid()) + ", started with arguments " + str(sys.argv) + "\n")
 
+logging_initialize.path_log_dir = None
+logging_initialize.prefix_output = os.path.basename(os.path.realpath(__file__)).partition(".")[0]
+
+
+# Build a path for auxiliary output alongside the log file, falling back to the working directory if the log
+# directory could not be created
+def path_output_get(name_output):
+	path_dir = logging_initialize.path_log_dir if logging_initialize.path_log_dir else os.getcwd()
+
+	return path_dir + os.path.sep + logging_initialize.prefix_output + " - " + name_output
+
+
+# Wraps a mutex to account the time spent waiting to acquire it. Only swapped in for the module's mutexes when
+# profiling, so there is no cost otherwise.
+class ProfiledLock:
+	def __init__(self, name, lock):
+		self.name = name
+		self.lock = lock
+		self.count_acquire = 0
+		self.time_wait = 0
+
+	def __enter__(self):
+		time_start = time.perf_counter_ns()
+
+		self.lock.acquire()
+
+		# The counters are only ever updated with the wrapped mutex held, so they need no locking of their own
+		self.time_wait += time.perf_counter_ns() - time_start
+		self.count_acquire += 1
+
+		return self
+
+	def __exit__(self, *exc_info):
+		self.lock.release()
+
+
+# Records the duration of a stage for a file in its result (if passed), and as a Chrome trace event when profiling
+class ProfileSpan:
+	__slots__ = ("stage", "path_file", "result", "time_start")
+
+	def __init__(self, stage, path_file, result):
+		self.stage = stage
+		self.path_file = path_file
+		self.result = result
+
+	def __enter__(self):
+		self.time_start = time.perf_counter_ns()
+
+		return self
+
+	def __exit__(self, *exc_info):
+		time_end = time.perf_counter_ns()
+
+		if self.result is not None:
+			self.result["durations_ms"][self.stage] = round((time_end - self.time_start) / 1000000, 3)
+
+		if profile_initialize.enabled:
+			# list.append() is atomic under the GIL; a mutex here would only skew the wait times we report
+			profile_span.list_events.append((self.stage, self.path_file, get_ident(), self.time_start, time_end))
+
+
+# Stand-in for ProfileSpan when there is nothing to record
+class ProfileSpanNull:
+	__slots__ = ()
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		return False
+
+
+# Return a context manager timing a stage (walk/sniff/probe/write) for a path, into the file's result if passed
+def profile_span(stage, path_file, result = None):
+	if not profile_initialize.enabled and result is None:
+		return profile_span.span_null
+
+	return ProfileSpan(stage, path_file, result)
+
+profile_span.span_null = ProfileSpanNull()
+profile_span.list_events = []
+
+
+# Swap the module's mutexes for accounting wrappers and start profiling the main thread
+def profile_initialize():
+	for name_mutex in NAMES_MUTEX_PROFILED:
+		globals()[name_mutex] = ProfiledLock(name_mutex, globals()[name_mutex])
+
+	profile_initialize.time_origin = time.perf_counter_ns()
+	profile_initialize.enabled = True
+
+	profile_initialize.profiler_main.enable()
+
+profile_initialize.enabled = False
+profile_initialize.time_origin = 0
+profile_initialize.profiler_main = cProfile.Profile()
+
+
+# Run a worker function (set_metadata()/audit_title()) under a profiler owned by the calling worker thread
+def run_profiled(function_worker, *args):
+	profiler = getattr(run_profiled.thread_local, "profiler", None)
+
+	if profiler is None:
+		profiler = cProfile.Profile()
+		run_profiled.thread_local.profiler = profiler
+
+		# list.append() is atomic under the GIL
+		run_profiled.list_profilers.append(profiler)
+
+	try:
+		profiler.enable()
+	except ValueError:
+		# From Python 3.12, only one profiler may be active in the interpreter, and the main thread's profiler
+		# covers the workers as well
+		function_worker(*args)
+	else:
+		try:
+			function_worker(*args)
+		finally:
+			profiler.disable()
+
+run_profiled.thread_local = local()
+run_profiled.list_profilers = []
+
+
+# Write the cProfile statistics and trace, and report time spent waiting on each mutex. Called after all threads
+# have joined.
+def profile_report():
+	profile_initialize.profiler_main.disable()
+
+	# Snapshot the mutex statistics before our own console output below adds to them
+	list_mutex_waits = [(name_mutex, globals()[name_mutex].count_acquire, globals()[name_mutex].time_wait) for
+	                    name_mutex in NAMES_MUTEX_PROFILED]
+
+	path_profile_main = path_output_get("profile main.prof")
+	profile_initialize.profiler_main.dump_stats(path_profile_main)
+	lock_console_print_and_log("Wrote main thread profile to \'" + path_profile_main + "\'")
+
+	list_profilers = [profiler for profiler in run_profiled.list_profilers if profiler.getstats()]
+
+	if list_profilers:
+		path_profile_workers = path_output_get("profile workers.prof")
+		pstats.Stats(*list_profilers).dump_stats(path_profile_workers)
+		lock_console_print_and_log("Wrote worker threads profile to \'" + path_profile_workers + "\'")
+
+	# Chrome trace event format expects timestamps and durations in microseconds
+	list_trace_events = []
+	dict_thread_names = {}
+
+	for stage, path_file, thread_id, time_start, time_end in profile_span.list_events:
+		list_trace_events.append({"name": stage, "cat": stage, "ph": "X", "pid": os.getpid(), "tid": thread_id,
+		                          "ts": (time_start - profile_initialize.time_origin) / 1000,
+		                          "dur": (time_end - time_start) / 1000, "args": {"path": path_file}})
+		dict_thread_names.setdefault(thread_id, "main" if thread_id == profile_report.thread_id_main else "worker")
+
+	for thread_id, thread_name in dict_thread_names.items():
+		list_trace_events.append({"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": thread_id,
+		                          "args": {"name": thread_name}})
+
+	path_trace = path_output_get("trace.json")
+
+	with open(path_trace, "w", encoding = "utf-8") as file_trace:
+		json.dump({"traceEvents": list_trace_events, "displayTimeUnit": "ms"}, file_trace)
+
+	lock_console_print_and_log("Wrote per-file trace to \'" + path_trace + "\'\n")
+
+	print_and_log_spacer()
+	lock_console_print_and_log("Time spent waiting on mutexes:\n")
+
+	for name_mutex, count_acquire, time_wait in list_mutex_waits:
+		lock_console_print_and_log(name_mutex + ": " + str(count_acquire) + " acquisitions, " + "{:.3f}".format(
+			time_wait / 1000000) + " ms waiting")
+
+	lock_console_print_and_log("")
+
+profile_report.thread_id_main = current_thread().ident
+
 
 def parse_file_name_from_path(root):
 	# Grab only the file name without the preceding path. The extension has already
@@ -266,7 +502,7 @@ percentage_completion_print.count_last_print = 0
 
 # Check if the container is in the format required, before we even go about probing for the currently set title
 # If the container is in Matroska format, ffprobe would return "matroska,webm"
-def is_format_matroska(probe, path_file):
+def is_format_matroska(probe, path_file, result):
 	is_format_correct = False
 
 	# Track probe start time in nano-seconds
@@ -293,6 +529,8 @@ def is_format_matroska(probe, path_file):
 
 			lock_console_print_and_log("Error probing metadata from \'" + path_file + "\'", True)
 			lock_console_print_and_log("Error" + str(sys.exc_info()), True)
+
+			result["errors"]["sniff"] = str(error_metadata_probe)
 		except:
 			# For reasons of efficiency, instead of calling lock_console_print_and_log(), we explicitly lock the
 			# console access mutex to prevent back and forth locking for successive statements in the block below
@@ -306,10 +544,14 @@ def is_format_matroska(probe, path_file):
 
 			# show_toast("Error", "Error probing \'" + path_file + "\'. Check the log.")
 			thread_async_toast("Error", "Error probing \'" + path_file + "\'. Check the log.")
+
+			result["errors"]["sniff"] = str(sys.exc_info()[1])
 	else:
 		lock_console_print_and_log(
 			"No probe tool found at \'" + probe[INDEX_TOOL_PATH] + "\' to read currently set title\n", True)
 
+		result["errors"]["sniff"] = "No probe tool found at \'" + probe[INDEX_TOOL_PATH] + "\'"
+
 	# Track probe end time in nano-seconds
 	with mutex_time:
 		# Save the total time taken to probe files thrown at us, to report a statistic at exit
@@ -318,8 +560,8 @@ def is_format_matroska(probe, path_file):
 	return is_format_correct
 
 
-# Retrieve currently set title and return in UTF-8 encoding
-def get_current_metadata(probe, path_file, list_failed_files_probe):
+# Retrieve currently set title and return in UTF-8 encoding. Failures are noted in the file's result.
+def get_current_metadata(probe, path_file, result):
 	title_current = ""
 
 	# Track probe start time in nano-seconds
@@ -351,9 +593,7 @@ def get_current_metadata(probe, path_file, list_failed_files_probe):
 			# show_toast("Error", "Failed to probe the title for one or more files. Check the log.")
 			thread_async_toast("Error", "Failed to probe the title for one or more files. Check the log.")
 
-			with mutex_list_files_failed_probe:
-				# Append the failed file to a list that will be reported at exit
-				list_failed_files_probe.append(path_file)
+			result["errors"]["probe"] = str(error_metadata_probe)
 		except:
 			# For reasons of efficiency, instead of calling lock_console_print_and_log(), we explicitly lock the
 			# console access mutex to prevent back and forth locking for successive statements in the block below
@@ -368,9 +608,7 @@ def get_current_metadata(probe, path_file, list_failed_files_probe):
 			# show_toast("Error", "Error probing \'" + path_file + "\'. Check the log.")
 			# thread_async_toast("Error", "Error probing \'" + path_file + "\'. Check the log.")
 
-			with mutex_list_files_failed_probe:
-				# Append the failed file to a list that will be reported at exit
-				list_failed_files_probe.append(path_file)
+			result["errors"]["probe"] = str(sys.exc_info()[1])
 		else:
 			title_current = (output_probe.strip()).encode("utf-8")
 
@@ -381,6 +619,8 @@ def get_current_metadata(probe, path_file, list_failed_files_probe):
 		lock_console_print_and_log(
 			"No probe tool found at \'" + probe[INDEX_TOOL_PATH] + "\' to read currently set title\n", True)
 
+		result["errors"]["probe"] = "No probe tool found at \'" + probe[INDEX_TOOL_PATH] + "\'"
+
 	# Track probe end time in nano-seconds
 	with mutex_time:
 		# Save the total time taken to probe files thrown at us, to report a statistic at exit
@@ -393,11 +633,349 @@ get_current_metadata.total_count_probe = 0
 get_current_metadata.total_time_probe = 0
 
 
+# Return the ID, size (None if unknown) and data offset of the EBML element at an offset. Raises IndexError if the
+# element's header runs past the data.
+def ebml_element_get(data, offset):
+	# An ID keeps its length marker; its length is told by the position of the first set bit
+	length_id = 1
+
+	while not data[offset] & (0x80 >> (length_id - 1)):
+		length_id += 1
+
+		if length_id > 4:
+			raise ValueError("Invalid EBML element ID at offset " + str(offset))
+
+	if len(data) < offset + length_id:
+		raise IndexError("EBML element ID past the data")
+
+	id_element = int.from_bytes(data[offset:offset + length_id], "big")
+	offset += length_id
+
+	# A size drops its length marker. All bits set means the size is unknown.
+	length_size = 1
+
+	while not data[offset] & (0x80 >> (length_size - 1)):
+		length_size += 1
+
+		if length_size > 8:
+			raise ValueError("Invalid EBML element size at offset " + str(offset))
+
+	if len(data) < offset + length_size:
+		raise IndexError("EBML element size past the data")
+
+	size = int.from_bytes(data[offset:offset + length_size], "big") & ((1 << (7 * length_size)) - 1)
+
+	if size == (1 << (7 * length_size)) - 1:
+		size = None
+
+	return id_element, size, offset + length_size
+
+
+# Return the [start, end) range of the Segment Info element, looking through the level 1 elements in the head, and
+# failing that, where the SeekHead points. Returns None if it can't be found.
+def info_range_get(fd, head):
+	offset_info = None
+
+	try:
+		id_element, size, offset = ebml_element_get(head, 0)
+
+		if id_element != ID_EBML_HEADER or size is None:
+			return None
+
+		id_element, _, offset_segment_data = ebml_element_get(head, offset + size)
+
+		if id_element != ID_EBML_SEGMENT:
+			return None
+
+		offset = offset_segment_data
+
+		while offset < len(head):
+			id_element, size, offset_data = ebml_element_get(head, offset)
+
+			if id_element == ID_EBML_INFO and size is not None:
+				return offset, offset_data + size
+
+			if id_element == ID_EBML_CLUSTER or size is None:
+				break
+
+			if id_element == ID_EBML_SEEK_HEAD:
+				offset_seek = offset_data
+
+				while offset_seek < min(offset_data + size, len(head)):
+					id_seek, size_seek, offset_seek_data = ebml_element_get(head, offset_seek)
+
+					# Only level 1 elements may be of unknown size
+					if size_seek is None:
+						raise ValueError("EBML element of unknown size in the SeekHead")
+
+					if id_seek == ID_EBML_SEEK:
+						offset_entry = offset_seek_data
+						seek_id = seek_position = None
+
+						while offset_entry < offset_seek_data + size_seek:
+							id_entry, size_entry, offset_entry_data = ebml_element_get(head, offset_entry)
+
+							if size_entry is None:
+								raise ValueError("EBML element of unknown size in a Seek entry")
+
+							value_entry = head[offset_entry_data:offset_entry_data + size_entry]
+
+							if id_entry == ID_EBML_SEEK_ID:
+								seek_id = int.from_bytes(value_entry, "big")
+							elif id_entry == ID_EBML_SEEK_POSITION:
+								seek_position = int.from_bytes(value_entry, "big")
+
+							offset_entry = offset_entry_data + size_entry
+
+						if seek_id == ID_EBML_INFO and seek_position is not None:
+							# Seek positions are relative to the Segment's data
+							offset_info = offset_segment_data + seek_position
+
+					offset_seek = offset_seek_data + size_seek
+
+			offset = offset_data + size
+	except (IndexError, ValueError):
+		# Malformed, or running past the head. Go with whatever the SeekHead told us by now.
+		pass
+
+	if offset_info is None:
+		return None
+
+	try:
+		os.lseek(fd, offset_info, os.SEEK_SET)
+
+		id_element, size, offset_data = ebml_element_get(os.read(fd, 16), 0)
+	except (IndexError, ValueError):
+		return None
+
+	if id_element != ID_EBML_INFO or size is None:
+		return None
+
+	return offset_info, offset_info + offset_data + size
+
+
+# Return the stat of a file, and if byte ranges touched are to be worked out after a write, its head, the range of
+# Segment Info to compare (the one found, unless passed), the bytes of that range plus a block past it, and the range of
+# Segment Info as found in this snapshot
+def file_snapshot_get(path_file, head_read, range_info = None):
+	stat_file = os.stat(path_file)
+	head = info = b""
+	range_info_found = None
+
+	if head_read:
+		fd = open_read_noatime(path_file)
+
+		try:
+			head = os.read(fd, SIZE_CHANGE_WINDOW)
+			range_info_found = info_range_get(fd, head)
+
+			if range_info is None:
+				range_info = range_info_found
+
+			# The head already holds Info if it lies within, and the block past it
+			if range_info and range_info[1] + SIZE_CHANGE_BLOCK > len(head):
+				os.lseek(fd, range_info[0], os.SEEK_SET)
+				info = os.read(fd, range_info[1] + SIZE_CHANGE_BLOCK - range_info[0])
+		finally:
+			os.close(fd)
+
+	return stat_file, head, range_info, info, range_info_found
+
+
+# Return the [start, end) byte ranges differing between two snapshots of a file, merged in order. The head and the old
+# Segment Info's region are compared, and any bytes appended are counted in.
+def ranges_changed_get(snapshot_before, snapshot_after):
+	stat_before, head_before, range_info, info_before, _ = snapshot_before
+	stat_after, head_after, _, info_after, _ = snapshot_after
+
+	list_ranges = ranges_differing_get(head_before, head_after, 0)
+
+	if range_info:
+		list_ranges += ranges_differing_get(info_before, info_after, range_info[0])
+
+	# Anything beyond the original size has been written afresh
+	if stat_after.st_size > stat_before.st_size:
+		list_ranges.append([stat_before.st_size, stat_after.st_size])
+
+	return ranges_merge_get(list_ranges)
+
+
+# Return the [start, end) byte ranges of a file compared between two snapshots (the head, the old Segment Info's region
+# and anything appended), merged in order
+def ranges_compared_get(snapshot_before, snapshot_after):
+	stat_before, head_before, range_info, info_before, _ = snapshot_before
+	stat_after, head_after, _, info_after, _ = snapshot_after
+
+	list_ranges = [[0, min(len(head_before), len(head_after))]]
+
+	if range_info:
+		list_ranges.append([range_info[0], range_info[0] + min(len(info_before), len(info_after))])
+
+	if stat_after.st_size > stat_before.st_size:
+		list_ranges.append([stat_before.st_size, stat_after.st_size])
+
+	return ranges_merge_get(list_ranges)
+
+
+# Return [start, end) byte ranges sorted, with overlapping and adjacent ranges merged
+def ranges_merge_get(list_ranges):
+	list_ranges.sort()
+	list_ranges_merged = []
+
+	for range_changed in list_ranges:
+		if list_ranges_merged and range_changed[0] <= list_ranges_merged[-1][1]:
+			list_ranges_merged[-1][1] = max(list_ranges_merged[-1][1], range_changed[1])
+		else:
+			list_ranges_merged.append(range_changed)
+
+	return list_ranges_merged
+
+
+# Return the [start, end) byte ranges, offset by a base, where two snapshots of a region differ. Blocks are compared
+# first, so only blocks that differ are compared a byte at a time.
+def ranges_differing_get(data_before, data_after, offset_base):
+	list_ranges = []
+	size_compared = min(len(data_before), len(data_after))
+	offset_run = None
+
+	for offset_block in range(0, size_compared, SIZE_CHANGE_BLOCK):
+		offset_block_end = min(offset_block + SIZE_CHANGE_BLOCK, size_compared)
+
+		if data_before[offset_block:offset_block_end] == data_after[offset_block:offset_block_end]:
+			if offset_run is not None:
+				list_ranges.append([offset_base + offset_run, offset_base + offset_block])
+				offset_run = None
+
+			continue
+
+		for offset in range(offset_block, offset_block_end):
+			if data_before[offset] != data_after[offset]:
+				if offset_run is None:
+					offset_run = offset
+			elif offset_run is not None:
+				list_ranges.append([offset_base + offset_run, offset_base + offset])
+				offset_run = None
+
+	if offset_run is not None:
+		list_ranges.append([offset_base + offset_run, offset_base + size_compared])
+
+	return list_ranges
+
+
+# Return a new record of what became of a file, for the results report
+def result_new(path_file):
+	return {"path": path_file, "outcome": None, "title_old": "", "title_new": "", "durations_ms": {}, "errors": {}}
+
+
+# Open a results report (and the change record, if asked for) alongside the log and start their writer. Audits are
+# reported the same way as tagging, under a name of their own.
+def result_report_open(name_report, format_report, change_record = False):
+	result_report_write.path = path_output_get(name_report + "." + format_report)
+	result_report_write.file = open(result_report_write.path, "w", encoding = "utf-8", newline = "")
+
+	if format_report == "csv":
+		result_report_write.writer_csv = csv.writer(result_report_write.file, lineterminator = "\n")
+		result_report_write.writer_csv.writerow(FIELDS_RESULT_REPORT)
+
+	if change_record:
+		result_report_write.path_changes = path_output_get("changes.jsonl")
+		result_report_write.file_changes = open(result_report_write.path_changes, "w", encoding = "utf-8")
+
+		lock_console_print_and_log("Writing a record of the byte ranges changed to \'" +
+		                           result_report_write.path_changes + "\'\n")
+
+	result_report_write.queue_results = queue.Queue(COUNT_RESULTS_QUEUED)
+	result_report_write.thread_writer = Thread(target = result_report_writer, name = "result_report_writer")
+
+	result_report_write.thread_writer.start()
+
+	lock_console_print_and_log("Writing results to \'" + result_report_write.path + "\'\n")
+
+
+# Queue a file's result for the report. Waits for the writer if it has fallen behind, so memory stays bounded.
+def result_report_write(result):
+	if result_report_write.queue_results:
+		result_report_write.queue_results.put(result)
+
+result_report_write.path = None
+result_report_write.file = None
+result_report_write.writer_csv = None
+result_report_write.path_changes = None
+result_report_write.file_changes = None
+result_report_write.queue_results = None
+result_report_write.thread_writer = None
+
+
+# Write queued results to the report until told to stop (None). Output is buffered, but flushed whenever the queue
+# runs dry so the report can be followed live. Being the only thread touching the counters, they need no locking.
+#
+# Should writing fail, keep draining the queue and counting, so workers waiting on a full queue aren't left hanging.
+def result_report_writer():
+	is_write_failed = False
+
+	while True:
+		result = result_report_write.queue_results.get()
+
+		if result is None:
+			break
+
+		if not is_write_failed:
+			try:
+				if result_report_write.writer_csv:
+					# A column can't nest, so the durations and errors are written as JSON
+					result_report_write.writer_csv.writerow(result[field] if isinstance(result[field], str) else
+					                                        json.dumps(result[field], ensure_ascii = False) for field in
+					                                        FIELDS_RESULT_REPORT)
+				else:
+					result_report_write.file.write(json.dumps(result, ensure_ascii = False) + "\n")
+
+				if result_report_write.file_changes and "changes" in result:
+					result_report_write.file_changes.write(
+						json.dumps(dict(path = result["path"], **result["changes"]), ensure_ascii = False) + "\n")
+
+				if result_report_write.queue_results.empty():
+					result_report_write.file.flush()
+
+					if result_report_write.file_changes:
+						result_report_write.file_changes.flush()
+			except (OSError, ValueError):
+				lock_console_print_and_log("\aError writing the results report, no more results will be written: " +
+				                           str(sys.exc_info()[1]), True)
+
+				is_write_failed = True
+
+		result_report_writer.dict_count_outcome[result["outcome"]] = result_report_writer.dict_count_outcome.get(
+			result["outcome"], 0) + 1
+
+		for stage in result["errors"]:
+			result_report_writer.dict_count_errors[stage] = result_report_writer.dict_count_errors.get(stage, 0) + 1
+
+result_report_writer.dict_count_outcome = {}
+result_report_writer.dict_count_errors = {}
+
+
+# Drain the results queued, and close the report. Called after all worker threads have joined.
+def result_report_close():
+	if result_report_write.queue_results:
+		result_report_write.queue_results.put(None)
+		result_report_write.thread_writer.join()
+
+		# Closing flushes, which fails the same way as a write would on a share gone offline
+		with suppress(OSError):
+			result_report_write.file.close()
+
+		if result_report_write.file_changes:
+			with suppress(OSError):
+				result_report_write.file_changes.close()
+
+		result_report_write.queue_results = None
+
+
 # Writes metadata parsed from the file name into the video file's tag
 #
 # Fields currently written:
 # - Title
-def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_set, percentage_gather = False):
+def set_metadata(path_file, percentage_gather = False):
 	root, extension = os.path.splitext(path_file)
 
 	# Strip the '.' from the extension passed in, and convert  to lower case.
@@ -427,12 +1005,24 @@ def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_
 
 			return
 
+		result = result_new(path_file)
+		result["title_new"] = title_set.decode("utf-8")
+
 		# Check if the container is in the format required. Else, there's no point proceeding with the current file.
-		if is_format_matroska(container_probe, path_file):
+		with profile_span("sniff", path_file, result):
+			is_matroska = is_format_matroska(container_probe, path_file, result)
+
+		if is_matroska:
 			# Get the current title
-			title_current = get_current_metadata(probe, path_file, list_failed_files_probe)
+			with profile_span("probe", path_file, result):
+				title_current = get_current_metadata(probe, path_file, result)
+
+			if title_current:
+				result["title_old"] = title_current.decode("utf-8")
 
 			if title_current == title_set:
+				result["outcome"] = "unchanged"
+
 				# Nothing to do, if the current title is the same as the title to be set
 				lock_console_print_and_log("The current title is already set to \'" + title_set.decode(
 					"utf-8") + "\' in \'" + path_file + "\'. Will skip processing...\n")
@@ -457,11 +1047,30 @@ def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_
 					# Writing the year with mkvpropedit is not supported by the MKV format developers!
 					# It has to be tagged separately with a tag. How lame!
 
+					# Snapshot the file's times (and head) to restore and/or work out what changed after the write
+					snapshot = None
+
+					if set_metadata.preserve_times or set_metadata.change_record:
+						try:
+							snapshot = file_snapshot_get(path_file, set_metadata.change_record)
+						except OSError:
+							lock_console_print_and_log("Error reading \'" + path_file + "\' before tagging: " + str(
+								sys.exc_info()[1]), True)
+
+							result["errors"]["snapshot"] = str(sys.exc_info()[1])
+						except Exception:
+							# A file we can't make sense of must only cost itself the change record, not the run
+							lock_console_print_and_log("Undefined exception reading \'" + path_file +
+							                           "\' before tagging: " + str(sys.exc_info()), True)
+
+							result["errors"]["snapshot"] = str(sys.exc_info()[1])
+
 					time_start = time.perf_counter_ns()
 
 					try:
-						output = subprocess.run((metadata[INDEX_TOOL_PATH], *metadata[INDEX_TOOL_OPTIONS]), check = True,
-						                        universal_newlines = True, stdout = subprocess.PIPE).stdout
+						with profile_span("write", path_file, result):
+							output = subprocess.run((metadata[INDEX_TOOL_PATH], *metadata[INDEX_TOOL_OPTIONS]),
+							                        check = True, universal_newlines = True, stdout = subprocess.PIPE).stdout
 					except subprocess.CalledProcessError as error_metadata_set:
 						if error_metadata_set.stderr:
 							lock_console_print_and_log(error_metadata_set.stderr, True)
@@ -477,9 +1086,8 @@ def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_
 						# show_toast("Error", "Failed to tag \'" + path_file + "\'. Check the log for details.")
 						thread_async_toast("Error", "Failed to tag \'" + path_file + "\'. Check the log for details.")
 
-						with mutex_list_files_failed_metadata_set:
-							# Append the failed file to a list that will be reported at exit
-							list_failed_files_metadata_set.append(path_file)
+						result["outcome"] = "tag_failed"
+						result["errors"]["write"] = str(error_metadata_set)
 					# Handle any generic exception
 					except:
 						# For reasons of efficiency, instead of calling lock_console_print_and_log(), we explicitly lock the
@@ -495,14 +1103,19 @@ def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_
 							# show_toast("Error", "Error tagging \'" + path_file + "\'. Check the log.")
 							# thread_async_toast("Error", "Error tagging \'" + path_file + "\'. Check the log.")
 
-						with mutex_list_files_failed_metadata_set:
-							# Append the failed file to a list that will be reported at exit
-							list_failed_files_metadata_set.append(path_file)
+						result["outcome"] = "tag_failed"
+						result["errors"]["write"] = str(sys.exc_info()[1])
 					else:
 						with mutex_time:
-							# Keep track of the total time taken to tag files thrown at us to report a statistic at exit
+							# Keep track of the total time taken to tag files thrown at us to report a statistic at exit.
+							# Settling the file below is not tagging, so is left out.
 							set_metadata.total_time_set += time.perf_counter_ns() - time_start
 
+						result["outcome"] = "tagged"
+
+						if snapshot:
+							file_changes_settle(path_file, snapshot, result)
+
 						with mutex_count:
 							# Keep track of the number of files tagged to present a total statistic at exit
 							set_metadata.total_count_set += 1
@@ -516,6 +1129,11 @@ def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_
 				else:
 					lock_console_print_and_log("No metadata tool found at \'" + metadata[INDEX_TOOL_PATH] + "\'\n", True)
 
+					result["outcome"] = "tag_failed"
+					result["errors"]["write"] = "No metadata tool found at \'" + metadata[INDEX_TOOL_PATH] + "\'"
+
+			result_report_write(result)
+
 			# This would have a (positive) non-zero value only if the percentage was asked to be reported
 			with mutex_count:
 				if set_metadata.total_count_percentage:
@@ -528,17 +1146,267 @@ def set_metadata(path_file, list_failed_files_probe, list_failed_files_metadata_
 			# Keep track of the number of files thrown for probing to present a total statistic at exit
 			get_current_metadata.total_count_files += 1
 
-			with mutex_list_files_failed_probe:
-				# Append the failed file to a list that will be reported at exit
-				list_failed_files_probe.append(path_file)
+			# The container check itself may have failed (say, with the share gone offline). Don't mistake that for a
+			# container in another format.
+			if "sniff" in result["errors"]:
+				result["outcome"] = "sniff_failed"
 
-			lock_console_print_and_log(
-				"\'" + path_file + "\'s container is not in Matroska format, though the extension is set so\n", True)
+				lock_console_print_and_log("Could not check the container of \'" + path_file + "\'\n", True)
+			else:
+				result["outcome"] = "not_matroska"
+
+				lock_console_print_and_log(
+					"\'" + path_file + "\'s container is not in Matroska format, though the extension is set so\n", True)
+
+			result_report_write(result)
 
 set_metadata.total_count_set = 0
 set_metadata.total_count_percentage = 0
 set_metadata.total_count_files = 0
 set_metadata.total_time_set = 0
+set_metadata.preserve_times = False
+set_metadata.change_record = False
+
+
+# After a successful write, note the byte ranges changed and/or restore the access and modification times from the
+# snapshot taken before it. Changes are worked out first, as reading the file may touch its access time.
+def file_changes_settle(path_file, snapshot, result):
+	stat_before, _, range_info, _, _ = snapshot
+
+	try:
+		if set_metadata.change_record:
+			snapshot_after = file_snapshot_get(path_file, True, range_info)
+			stat_after, _, _, _, range_info_new = snapshot_after
+			list_ranges = ranges_changed_get(snapshot, snapshot_after)
+
+			# The ranges are only exact if every place mkvpropedit may have written to was compared. That is where the
+			# old Info was (else its Void rewrite could be anywhere), and where the new Info now is. And nothing found
+			# changed though the write succeeded means we looked in the wrong place. Otherwise, flag the whole file as
+			# touched rather than have a sync miss the change.
+			is_complete = range_info is not None and range_info_new is not None and bool(list_ranges) and any(
+				range_compared[0] <= range_info_new[0] and range_info_new[1] <= range_compared[1] for range_compared in
+				ranges_compared_get(snapshot, snapshot_after))
+
+			if not is_complete:
+				list_ranges = [[0, stat_after.st_size]]
+
+			result["changes"] = {"size_before": stat_before.st_size, "size_after": stat_after.st_size,
+			                     "mtime_ns": stat_before.st_mtime_ns if set_metadata.preserve_times else
+			                     stat_after.st_mtime_ns, "ranges": list_ranges, "ranges_exact": is_complete}
+
+		if set_metadata.preserve_times:
+			os.utime(path_file, ns = (stat_before.st_atime_ns, stat_before.st_mtime_ns))
+	except OSError:
+		lock_console_print_and_log("Error settling \'" + path_file + "\' after tagging: " + str(sys.exc_info()[1]), True)
+
+		result["errors"]["settle"] = str(sys.exc_info()[1])
+	except Exception:
+		lock_console_print_and_log("Undefined exception settling \'" + path_file + "\' after tagging: " + str(
+			sys.exc_info()), True)
+
+		result["errors"]["settle"] = str(sys.exc_info()[1])
+
+
+# Open a file for reading without updating its access time, where the OS supports it
+def open_read_noatime(path_file):
+	flags = os.O_RDONLY | getattr(os, "O_BINARY", 0)
+
+	try:
+		return os.open(path_file, flags | getattr(os, "O_NOATIME", 0))
+	except PermissionError:
+		# O_NOATIME is only permitted to the file's owner (or a privileged user). Fall back to a plain read.
+		return os.open(path_file, flags)
+
+
+# Check if the container is in Matroska format by reading the EBML header ourselves. Unlike is_format_matroska(),
+# this doesn't spawn a probe, doesn't update the access time and drops the pages read from the page cache, so an
+# audit doesn't evict what's cached for playback.
+def is_header_matroska(path_file, result):
+	is_format_correct = False
+
+	# Track probe start time in nano-seconds
+	with mutex_time:
+		time_start = time.perf_counter_ns()
+
+	try:
+		fd = open_read_noatime(path_file)
+	except OSError:
+		lock_console_print_and_log("Error opening \'" + path_file + "\': " + str(sys.exc_info()), True)
+
+		result["errors"]["sniff"] = str(sys.exc_info()[1])
+	else:
+		try:
+			header = os.read(fd, SIZE_HEADER_EBML_READ)
+
+			# ffprobe reports "matroska,webm" for either DocType, so accept both as is_format_matroska() does
+			if header.startswith(MAGIC_EBML) and (b"matroska" in header or b"webm" in header):
+				is_format_correct = True
+
+			if hasattr(os, "posix_fadvise"):
+				os.posix_fadvise(fd, 0, len(header), os.POSIX_FADV_DONTNEED)
+		except OSError:
+			lock_console_print_and_log("Error reading \'" + path_file + "\': " + str(sys.exc_info()), True)
+
+			result["errors"]["sniff"] = str(sys.exc_info()[1])
+		finally:
+			os.close(fd)
+
+	# Track probe end time in nano-seconds
+	with mutex_time:
+		# Save the total time taken to probe files thrown at us, to report a statistic at exit
+		get_current_metadata.total_time_probe += time.perf_counter_ns() - time_start
+
+	return is_format_correct
+
+
+# Read the currently set title out of the Segment Info ourselves and return it in UTF-8 encoding, as
+# get_current_metadata() would. Like is_header_matroska(), this doesn't spawn a probe, doesn't update the access time
+# and drops the pages read from the page cache. Returns None if the Segment Info can't be located, for the caller to
+# fall back to probing. Failures are noted in the file's result.
+def get_current_metadata_header(path_file, result):
+	title_current = b""
+
+	# Track probe start time in nano-seconds
+	with mutex_time:
+		time_start = time.perf_counter_ns()
+
+	try:
+		fd = open_read_noatime(path_file)
+	except OSError:
+		lock_console_print_and_log("Error opening '" + path_file + "': " + str(sys.exc_info()), True)
+
+		result["errors"]["probe"] = str(sys.exc_info()[1])
+	else:
+		list_ranges_read = []
+
+		try:
+			head = os.read(fd, SIZE_HEADER_EBML_READ)
+			list_ranges_read.append((0, len(head)))
+
+			range_info = info_range_get(fd, head)
+
+			if range_info is None:
+				title_current = None
+			else:
+				# The head already holds Info if it lies within
+				if range_info[1] > len(head):
+					os.lseek(fd, range_info[0], os.SEEK_SET)
+					info = os.read(fd, range_info[1] - range_info[0])
+					list_ranges_read.append((range_info[0], len(info)))
+				else:
+					info = head[range_info[0]:range_info[1]]
+
+				# Title is a child of Info. No Title means no title set.
+				_, _, offset = ebml_element_get(info, 0)
+
+				while offset < len(info):
+					id_element, size, offset_data = ebml_element_get(info, offset)
+
+					if size is None:
+						raise ValueError("EBML element of unknown size in the Segment Info")
+
+					if id_element == ID_EBML_TITLE:
+						# ffprobe reports the title stripped, so compare likewise
+						title_current = info[offset_data:offset_data + size].decode("utf-8").strip().encode("utf-8")
+						break
+
+					offset = offset_data + size
+
+			if hasattr(os, "posix_fadvise"):
+				for offset_read, size_read in list_ranges_read:
+					os.posix_fadvise(fd, offset_read, size_read, os.POSIX_FADV_DONTNEED)
+		except OSError:
+			lock_console_print_and_log("Error reading '" + path_file + "': " + str(sys.exc_info()), True)
+
+			title_current = b""
+			result["errors"]["probe"] = str(sys.exc_info()[1])
+		except (IndexError, ValueError):
+			lock_console_print_and_log("Error reading the title of '" + path_file + "': " + str(sys.exc_info()), True)
+
+			title_current = b""
+			result["errors"]["probe"] = str(sys.exc_info()[1])
+		else:
+			if title_current is not None:
+				with mutex_count:
+					# Keep track of the number of files probed to present a total statistic at exit
+					get_current_metadata.total_count_probe += 1
+		finally:
+			os.close(fd)
+
+	# Left to the caller to count if it falls back to probing
+	if title_current is not None:
+		with mutex_count:
+			# Keep track of the number of files thrown for probing to present a total statistic at exit
+			get_current_metadata.total_count_files += 1
+
+	# Track probe end time in nano-seconds
+	with mutex_time:
+		# Save the total time taken to probe files thrown at us, to report a statistic at exit
+		get_current_metadata.total_time_probe += time.perf_counter_ns() - time_start
+
+	return title_current
+
+
+# Read-only counterpart of set_metadata(). Sniffs the container and reads the currently set title, and reports files
+# whose title differs from the one parsed from their name, with the title found as the old one and the title parsed as
+# the new. Nothing is ever written to the files audited.
+def audit_title(path_file, percentage_gather = False):
+	root, extension = os.path.splitext(path_file)
+	extension = (extension.partition(os.path.extsep)[2]).lower()
+
+	title_expected, _ = parse_file_name_from_path(root)
+	title_expected = title_expected.encode("utf-8")
+
+	container_probe, metadata, probe = dict_metadata_tool_platform_get(extension, title_expected, path_file)
+
+	# Audit only the files a tagging run would process
+	if not (all(container_probe) and all(metadata) and all(probe)):
+		return
+
+	result = result_new(path_file)
+	result["title_new"] = title_expected.decode("utf-8")
+
+	with profile_span("sniff", path_file, result):
+		is_matroska = is_header_matroska(path_file, result)
+
+	if is_matroska:
+		with profile_span("probe", path_file, result):
+			title_current = get_current_metadata_header(path_file, result)
+
+			# Segment Info wasn't where we looked for it. Let ffprobe have a go.
+			if title_current is None:
+				title_current = get_current_metadata(probe, path_file, result)
+
+		# get_current_metadata() returns an empty title on failure too, so tell a failure from a missing title
+		if "probe" in result["errors"]:
+			result["outcome"] = "probe_failed"
+		elif not title_current:
+			result["outcome"] = "missing"
+		elif title_current != title_expected:
+			result["outcome"] = "mismatch"
+			result["title_old"] = title_current.decode("utf-8")
+	else:
+		with mutex_count:
+			# Keep track of the number of files probed to present a total statistic at exit
+			get_current_metadata.total_count_probe += 1
+			# Keep track of the number of files thrown for probing to present a total statistic at exit
+			get_current_metadata.total_count_files += 1
+
+		# A file we couldn't read (gone, no permission, share offline) says nothing about its container
+		if "sniff" in result["errors"]:
+			result["outcome"] = "sniff_failed"
+		else:
+			result["outcome"] = "not_matroska"
+
+	# Only files needing attention are reported
+	if result["outcome"]:
+		result_report_write(result)
+
+	# This would have a (positive) non-zero value only if the percentage was asked to be reported
+	with mutex_count:
+		if set_metadata.total_count_percentage:
+			with mutex_console:
+				percentage_completion_print()
 
 
 # Convert the time in nanoseconds passed to hours, minutes and seconds as a string
@@ -569,36 +1437,48 @@ def total_time_in_hms_get(total_time_ns):
 		seconds) + " seconds")
 
 
-# Print stats. No need to lock access to count/console mutexes here as we're called after all threads have joined
-def statistic_print(list_failed_files_probe, list_failed_files_metadata_set):
-	if len(list_failed_files_probe):
+# Print stats. No need to lock access to count/console mutexes here as we're called after all threads have joined.
+# Failures (and for an audit, titles differing) are summarized from the counters of the results report; the report
+# itself lists the files.
+def statistic_print():
+	count_failed_sniff = result_report_writer.dict_count_outcome.get("sniff_failed", 0)
+	count_not_matroska = result_report_writer.dict_count_outcome.get("not_matroska", 0)
+	count_failed_probe = result_report_writer.dict_count_errors.get("probe", 0)
+	count_failed_metadata_set = result_report_writer.dict_count_outcome.get("tag_failed", 0)
+	count_title_mismatch = result_report_writer.dict_count_outcome.get("mismatch", 0)
+	count_title_missing = result_report_writer.dict_count_outcome.get("missing", 0)
+	path_report = result_report_write.path
+
+	if count_failed_sniff or count_not_matroska or count_failed_probe or count_failed_metadata_set or \
+			count_title_mismatch or count_title_missing:
 		print_and_log_spacer()
 
-		print("\aHere's the list of the " + str(len(list_failed_files_probe)) + " files for which probing failed:\n")
-		logging.info(
-			"Here's the list of the " + str(len(list_failed_files_probe)) + " files for which probing failed:\n")
+		if count_title_mismatch:
+			print("Title differs from the name for " + str(count_title_mismatch) + " files")
+			logging.info("Title differs from the name for " + str(count_title_mismatch) + " files")
 
-		for failed_file in list_failed_files_probe:
-			print(failed_file)
-			logging.info(failed_file)
+		if count_title_missing:
+			print("No title set for " + str(count_title_missing) + " files")
+			logging.info("No title set for " + str(count_title_missing) + " files")
 
-		print("\n")
-		logging.info("\n")
+		if count_failed_sniff:
+			print("\aChecking the container failed for " + str(count_failed_sniff) + " files")
+			logging.info("Checking the container failed for " + str(count_failed_sniff) + " files")
 
-	if len(list_failed_files_metadata_set):
-		print_and_log_spacer()
+		if count_not_matroska:
+			print("\aContainer not in Matroska format for " + str(count_not_matroska) + " files")
+			logging.info("Container not in Matroska format for " + str(count_not_matroska) + " files")
 
-		print("\aHere's the list of the " + str(
-			len(list_failed_files_metadata_set)) + " files for which setting metadata failed:\n")
-		logging.info("Here's the list of the " + str(
-			len(list_failed_files_metadata_set)) + " files for which setting metadata failed:\n")
+		if count_failed_probe:
+			print("\aProbing failed for " + str(count_failed_probe) + " files")
+			logging.info("Probing failed for " + str(count_failed_probe) + " files")
 
-		for failed_file in list_failed_files_metadata_set:
-			print(failed_file)
-			logging.info(failed_file)
+		if count_failed_metadata_set:
+			print("\aSetting metadata failed for " + str(count_failed_metadata_set) + " files")
+			logging.info("Setting metadata failed for " + str(count_failed_metadata_set) + " files")
 
-		print("\n")
-		logging.info("\n")
+		print("See \'" + path_report + "\' for the files and errors\n")
+		logging.info("See \'" + path_report + "\' for the files and errors\n")
 
 	# Print statistics on how long we took to query
 	#
@@ -630,6 +1510,184 @@ def statistic_print(list_failed_files_probe, list_failed_files_metadata_set):
 		logging.info("No files to probe")
 
 
+# Walk a directory like os.walk(), but yield each directory with the name and stat of the files in it, saving a second
+# look up of the files
+def path_walk_stat(path):
+	list_dirs = [path]
+
+	while list_dirs:
+		path_dir = list_dirs.pop()
+		list_files = []
+
+		# Like os.walk(), skip directories we can't list
+		try:
+			with os.scandir(path_dir) as entries:
+				for entry in entries:
+					try:
+						if entry.is_dir():
+							# Like os.walk(), don't descend into symbolic links to directories
+							if not entry.is_symlink():
+								list_dirs.append(entry.path)
+						else:
+							list_files.append((entry.name, entry.stat()))
+					except OSError:
+						continue
+		except OSError:
+			continue
+
+		yield path_dir, list_files
+
+
+# Walk the paths passed on the command line and write the files found to a manifest, for runs to consume later
+# without walking again
+def manifest_write(files_to_process, path_manifest):
+	names = bytearray()
+	table_dirs = bytearray()
+	table_files = bytearray()
+	dict_dir_index = {}
+
+	def dir_index_get(path_dir):
+		if path_dir not in dict_dir_index:
+			name_dir = os.fsencode(path_dir)
+
+			dict_dir_index[path_dir] = len(dict_dir_index)
+			table_dirs.extend(STRUCT_MANIFEST_DIR.pack(len(names), len(name_dir)))
+			names.extend(name_dir)
+
+		return dict_dir_index[path_dir]
+
+	def file_add(index_dir, file_name, stat_file):
+		name_file = os.fsencode(file_name)
+
+		table_files.extend(STRUCT_MANIFEST_FILE.pack(index_dir, len(names), len(name_file), stat_file.st_size,
+		                                             stat_file.st_mtime_ns))
+		names.extend(name_file)
+
+	for path in files_to_process:
+		if os.path.isdir(path):
+			with profile_span("walk", path):
+				for path_dir, list_files in path_walk_stat(path):
+					if list_files:
+						index_dir = dir_index_get(path_dir)
+
+						for file_name, stat_file in list_files:
+							file_add(index_dir, file_name, stat_file)
+		else:
+			try:
+				stat_file = os.stat(path)
+			except OSError:
+				lock_console_print_and_log("Error reading \'" + path + "\': " + str(sys.exc_info()), True)
+			else:
+				file_add(dir_index_get(os.path.dirname(path)), os.path.basename(path), stat_file)
+
+	count_files = len(table_files) // STRUCT_MANIFEST_FILE.size
+	offset_dirs = STRUCT_MANIFEST_HEADER.size
+	offset_files = offset_dirs + len(table_dirs)
+	offset_names = offset_files + len(table_files)
+
+	# Write to a temporary file first, so an interrupted walk doesn't leave a truncated manifest behind
+	path_manifest_temp = path_manifest + ".tmp"
+
+	with open(path_manifest_temp, "wb") as file_manifest:
+		file_manifest.write(STRUCT_MANIFEST_HEADER.pack(MAGIC_MANIFEST, VERSION_MANIFEST, len(dict_dir_index),
+		                                                count_files, offset_dirs, offset_files, offset_names))
+		file_manifest.write(table_dirs)
+		file_manifest.write(table_files)
+		file_manifest.write(names)
+
+	os.replace(path_manifest_temp, path_manifest)
+
+	lock_console_print_and_log("Wrote a manifest of " + str(count_files) + " files in " + str(
+		len(dict_dir_index)) + " directories to \'" + path_manifest + "\'\n")
+
+
+# Read only access to a manifest written by manifest_write(). The manifest is memory mapped, and paths are only
+# built as they're handed out.
+class ManifestReader:
+	def __init__(self, path_manifest):
+		with open(path_manifest, "rb") as file_manifest:
+			self.map = mmap.mmap(file_manifest.fileno(), 0, access = mmap.ACCESS_READ)
+
+		if len(self.map) < STRUCT_MANIFEST_HEADER.size:
+			self.map.close()
+
+			raise ValueError("\'" + path_manifest + "\' is too short to be a manifest")
+
+		magic, version, self.count_dirs, self.count_files, self.offset_dirs, self.offset_files, self.offset_names = \
+			STRUCT_MANIFEST_HEADER.unpack_from(self.map)
+
+		if magic != MAGIC_MANIFEST or version != VERSION_MANIFEST:
+			self.map.close()
+
+			raise ValueError("\'" + path_manifest + "\' is not a manifest of a version supported")
+
+		if not self.is_valid():
+			self.map.close()
+
+			raise ValueError("\'" + path_manifest + "\' is truncated or corrupt")
+
+		# Directories are far fewer than files, so decode each only once
+		self.list_dirs = [None] * self.count_dirs
+
+	# Check the tables fit in the file and every entry points inside the names blob, so reading entries later can't
+	# fail midway through a run
+	def is_valid(self):
+		offset_dirs_end = self.offset_dirs + self.count_dirs * STRUCT_MANIFEST_DIR.size
+		offset_files_end = self.offset_files + self.count_files * STRUCT_MANIFEST_FILE.size
+
+		if not (STRUCT_MANIFEST_HEADER.size <= self.offset_dirs <= offset_dirs_end <= self.offset_files <=
+		        offset_files_end <= self.offset_names <= len(self.map)):
+			return False
+
+		size_names = len(self.map) - self.offset_names
+
+		with memoryview(self.map) as view:
+			for offset, length in STRUCT_MANIFEST_DIR.iter_unpack(view[self.offset_dirs:offset_dirs_end]):
+				if offset + length > size_names:
+					return False
+
+			for index_dir, offset, length, _, _ in STRUCT_MANIFEST_FILE.iter_unpack(
+					view[self.offset_files:offset_files_end]):
+				if index_dir >= self.count_dirs or offset + length > size_names:
+					return False
+
+		return True
+
+	def __len__(self):
+		return self.count_files
+
+	def __enter__(self):
+		return self
+
+	def __exit__(self, *exc_info):
+		self.map.close()
+
+	def name_get(self, offset, length):
+		return os.fsdecode(self.map[self.offset_names + offset:self.offset_names + offset + length])
+
+	def dir_get(self, index_dir):
+		if self.list_dirs[index_dir] is None:
+			self.list_dirs[index_dir] = self.name_get(
+				*STRUCT_MANIFEST_DIR.unpack_from(self.map, self.offset_dirs + index_dir * STRUCT_MANIFEST_DIR.size))
+
+		return self.list_dirs[index_dir]
+
+	# Return the path, size and mtime (ns) of a file by index
+	def file_get(self, index_file):
+		index_dir, offset, length, size, mtime_ns = STRUCT_MANIFEST_FILE.unpack_from(
+			self.map, self.offset_files + index_file * STRUCT_MANIFEST_FILE.size)
+
+		return os.path.join(self.dir_get(index_dir), self.name_get(offset, length)), size, mtime_ns
+
+	# Yield the paths of the files in order, waiting on a semaphore (if passed) before each
+	def paths_get(self, semaphore = None):
+		for index_file in range(self.count_files):
+			if semaphore:
+				semaphore.acquire()
+
+			yield self.file_get(index_file)[0]
+
+
 # For reading tags with UTF-8 encoding, we need a UTF-8 enabled console (or command prompt, in Windows parlance).
 # This is applicable for writing tags as well. So warn the user to have the pre-requisite ready.
 def sound_utf8_warning():
@@ -642,24 +1700,77 @@ def sound_utf8_warning():
 
 
 # Parse command line arguments and return option and/or values of action
-def cmd_line_parse(opt_percentage):
+def cmd_line_parse(opt_percentage, opt_profile, opt_audit, opt_audit_format, opt_manifest_write, opt_manifest_read,
+                   opt_preserve_times, opt_change_record):
 	parser = argparse.ArgumentParser(
 		description = "Tags supported video files with the title formed from the file's name", add_help = True)
 	parser.add_argument("-p", opt_percentage, required = False, action = "store_true",
 	                    default = None, dest = "percentage",
 	                    help = "Show the percentage of files completed (not the actual data processed; just the files")
+	parser.add_argument(opt_profile, required = False, action = "store_true", default = None, dest = "profile",
+	                    help = "Write cProfile statistics, a per-file trace (Chrome trace event format) and mutex wait "
+	                           "times alongside the log")
+	parser.add_argument(opt_audit, required = False, action = "store_true", default = None, dest = "audit",
+	                    help = "Don't tag; only report files whose title differs from their name, has no title set or "
+	                           "whose container isn't Matroska, to a report alongside the log")
+	parser.add_argument(opt_audit_format, required = False, default = FORMATS_RESULT_REPORT[0],
+	                    choices = FORMATS_RESULT_REPORT, dest = "audit_format",
+	                    help = "Format of the audit report (default: " + FORMATS_RESULT_REPORT[0] + ")")
+
+	group_manifest = parser.add_mutually_exclusive_group()
+	group_manifest.add_argument(opt_manifest_write, required = False, default = None, dest = "manifest_write",
+	                            metavar = "PATH_MANIFEST",
+	                            help = "Walk the paths passed, write the files found to a manifest and process them "
+	                                   "from it")
+	group_manifest.add_argument(opt_manifest_read, required = False, default = None, dest = "manifest_read",
+	                            metavar = "PATH_MANIFEST",
+	                            help = "Process the files listed in a manifest written earlier, without walking")
+
+	parser.add_argument(opt_preserve_times, required = False, action = "store_true", default = None,
+	                    dest = "preserve_times",
+	                    help = "Restore the access and modification times of files after tagging them")
+	parser.add_argument(opt_change_record, required = False, action = "store_true", default = None,
+	                    dest = "change_record",
+	                    help = "Write a record of the files tagged and the byte ranges changed in each alongside the log")
 
 	result_parse, files_to_process = parser.parse_known_args()
 
-	return result_parse.percentage, files_to_process
+	if result_parse.manifest_read and files_to_process:
+		parser.error(opt_manifest_read + " processes only the files in the manifest; don't pass paths along with it")
+
+	return result_parse, files_to_process
 
 
-# Spawn a pool of threads to handle actual probing and tagging
-def threads_tag(list_files, list_files_failed_probe, list_files_failed_metadata_set, percentage_gather):
-	with ThreadPool(COUNT_THREADS_TAGGER) as pool:
-		pool.starmap(set_metadata, zip(list_files, itertools.repeat(list_files_failed_probe),
-		                               itertools.repeat(list_files_failed_metadata_set),
-		                               itertools.repeat(percentage_gather)))
+# Spawn a pool of threads to handle actual probing and tagging (or auditing). Files are either a list, or a
+# ManifestReader handing them out as the workers get to them.
+def threads_tag(list_files, percentage_gather, audit = False):
+	# Gathering the headcount is the same for either, so leave it to set_metadata()
+	function_worker = audit_title if audit and not percentage_gather else set_metadata
+
+	if profile_initialize.enabled:
+		function_worker = functools.partial(run_profiled, function_worker)
+
+	with ThreadPool(COUNT_THREADS_AUDIT if audit else COUNT_THREADS_TAGGER) as pool:
+		if isinstance(list_files, ManifestReader):
+			# The pool reads through the paths passed as fast as it can, so have the reader wait for the workers once
+			# it's so many files ahead of them. Results are None, and only consumed to run through them all.
+			semaphore_files = BoundedSemaphore(COUNT_FILES_MANIFEST_QUEUED)
+			function_worker = functools.partial(run_released, semaphore_files, function_worker, percentage_gather)
+
+			for _ in pool.imap_unordered(function_worker, list_files.paths_get(semaphore_files),
+			                             COUNT_FILES_MANIFEST_CHUNK):
+				pass
+		else:
+			pool.starmap(function_worker, zip(list_files, itertools.repeat(percentage_gather)))
+
+
+# Run a worker function (set_metadata()/audit_title()) for a file, and release the semaphore the file was handed out
+# under, whatever happens
+def run_released(semaphore, function_worker, percentage_gather, path_file):
+	try:
+		function_worker(path_file, percentage_gather)
+	finally:
+		semaphore.release()
 
 
 # Like the function name says, initialize the needy
@@ -675,20 +1786,19 @@ def initialize(script):
 
 
 # Walk each path passed on the command line and build lists of files to process
-def path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone, list_files_failed_probe,
-                  list_files_failed_metadata_set, percentage):
+def path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone, percentage, audit = False):
 	for path in files_to_process:
 		if os.path.isdir(path):
 			if not path_walk_tag.path_walked:
 				# If it's a directory, walk through for files below
-				for path_dir, _, file_names in os.walk(path):
-					for file_name in file_names:
-						list_files_from_dir.append(os.path.join(path_dir, file_name))
+				with profile_span("walk", path):
+					for path_dir, _, file_names in os.walk(path):
+						for file_name in file_names:
+							list_files_from_dir.append(os.path.join(path_dir, file_name))
 
 			# Only makes sense to spawn threads if we have a valid list of files to process
 			if list_files_from_dir:
-				threads_tag(list_files_from_dir, list_files_failed_probe, list_files_failed_metadata_set,
-								percentage)
+				threads_tag(list_files_from_dir, percentage, audit)
 		else:
 			if not path_walk_tag.path_walked:
 				# We got a file, do the needful
@@ -698,7 +1808,7 @@ def path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone,
 	path_walk_tag.path_walked = True
 
 	if list_files_standalone:
-		threads_tag(list_files_standalone, list_files_failed_probe, list_files_failed_metadata_set, percentage)
+		threads_tag(list_files_standalone, percentage, audit)
 
 path_walk_tag.path_walked = False
 
@@ -710,46 +1820,103 @@ def main(argv):
 		root, _ = os.path.splitext(sys.argv[0])
 
 		opt_percentage = "--percentage-completion"
-
-		percentage, files_to_process = cmd_line_parse(opt_percentage)
-
-		if files_to_process:
+		opt_profile = "--profile"
+		opt_audit = "--audit"
+		opt_audit_format = "--audit-format"
+		opt_manifest_write = "--write-manifest"
+		opt_manifest_read = "--from-manifest"
+		opt_preserve_times = "--preserve-times"
+		opt_change_record = "--change-record"
+
+		result_parse, files_to_process = cmd_line_parse(opt_percentage, opt_profile, opt_audit, opt_audit_format,
+		                                                opt_manifest_write, opt_manifest_read, opt_preserve_times,
+		                                                opt_change_record)
+		percentage = result_parse.percentage
+
+		# Resolve the manifest's path before we change the working directory
+		path_manifest = result_parse.manifest_write or result_parse.manifest_read
+
+		if path_manifest:
+			path_manifest = os.path.abspath(path_manifest)
+
+		if files_to_process or result_parse.manifest_read:
 			initialize(sys.argv[0])
 
+			if result_parse.profile:
+				profile_initialize()
+
 			# Remove duplicates from the source path(s)
 			files_to_process = [*set(files_to_process)]
 
-			# Lists containing  files failing the probe, and a list of files we failed to set metadata for.
-			# Used to provide a summary of the erroneous files at the end of all.
-			list_files_failed_probe = []
-			list_files_failed_metadata_set = []
 			# List for processing directories and standalone files passed on the command line
 			list_files_from_dir = []
 			list_files_standalone = []
+			manifest = None
+
+			if result_parse.manifest_write:
+				print("Walking to write a manifest...\n")
+				logging.info("Walking to write a manifest...\n")
 
-			if percentage:
-				print("Gathering file count for reporting percentage...", end = " ")
-				logging.info("Gathering file count for reporting percentage... ")
+				manifest_write(files_to_process, path_manifest)
 
-				# Gather a headcount for reporting percentage completion
-				path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone, list_files_failed_probe,
-				              list_files_failed_metadata_set, percentage)
+			# Keep the manifest (if any) mapped through both the headcount and the actual run, and unmapped whatever
+			# happens in either
+			with ExitStack() as stack_manifest:
+				if path_manifest:
+					try:
+						manifest = stack_manifest.enter_context(ManifestReader(path_manifest))
+					except (OSError, ValueError):
+						lock_console_print_and_log("\aError reading the manifest: " + str(sys.exc_info()[1]), True)
+						logging.shutdown()
+
+						return 1
+
+				if percentage:
+					print("Gathering file count for reporting percentage...", end = " ")
+					logging.info("Gathering file count for reporting percentage... ")
+
+					# Gather a headcount for reporting percentage completion
+					if manifest is not None:
+						threads_tag(manifest, percentage)
+					else:
+						path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone, percentage)
+
+					print("done.\n\n")
+					logging.info("done.\n\n")
 
-				print("done.\n\n")
-				logging.info("done.\n\n")
+					# We've already gathered the headcount, so flag accordingly, so the next walk
+					# of the path to process will be for actual tagging
+					percentage = False
 
-				# We've already gathered the headcount, so flag accordingly, so the next walk
-				# of the path to process will be for actual tagging
-				percentage = False
+				if result_parse.audit:
+					print("Initiating audit (read-only)...\n\n")
+					logging.info("Initiating audit (read-only)...\n")
 
-			print("Initiating probing and tagging...\n\n")
-			logging.info("Initiating probing and tagging...\n")
+					result_report_open("audit", result_parse.audit_format)
+				else:
+					print("Initiating probing and tagging...\n\n")
+					logging.info("Initiating probing and tagging...\n")
+
+					set_metadata.preserve_times = bool(result_parse.preserve_times)
+					set_metadata.change_record = bool(result_parse.change_record)
+
+					result_report_open("results", FORMATS_RESULT_REPORT[0], set_metadata.change_record)
+
+				# Start the actual loop probing and tagging. Whatever happens, stop the report writer, else the
+				# interpreter would wait on it forever at exit.
+				try:
+					if manifest is not None:
+						threads_tag(manifest, percentage, result_parse.audit)
+					else:
+						path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone, percentage,
+						              result_parse.audit)
+				finally:
+					result_report_close()
 
-			# Start the actual loop probing and tagging
-			path_walk_tag(files_to_process, list_files_from_dir, list_files_standalone, list_files_failed_probe,
-			              list_files_failed_metadata_set, percentage)
+			statistic_print()
 
-			statistic_print(list_files_failed_probe, list_files_failed_metadata_set)
+			if result_parse.profile:
+				profile_report()
 		# Slows down the script exit, so disabled for now
 		# show_completion_toast(argv[0])
 		else: